@@ -0,0 +1,151 @@
+"""
+Compiled TCP passes for analyze_pcap.py (retransmissions and handshake RTT)
+"""
+import sys
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Without numba the same code runs as plain Python, only slower
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+TH_SYN = 0x02
+TH_ACK = 0x10
+
+# Above this many TCP packets in a capture the seen-sequence set is replaced
+# by a Bloom filter: ~10 bits per key at a 1% false-positive rate instead of a
+# full set entry. A false positive counts a packet as a retransmission.
+BLOOM_MIN_PACKETS = 1 << 22
+BLOOM_BITS_PER_KEY = 9.6  # -ln(0.01) / ln(2)^2
+BLOOM_HASHES = 7  # bits per key * ln(2)
+MASK63 = 0x7FFFFFFFFFFFFFFF
+
+# Integer arithmetic below is kept under 2**63 with plain ints, so the numba
+# (int64) and plain-Python results are identical
+
+
+@njit(cache=True)
+def _mix(x):
+    """64-bit finalizer (murmur3 style), kept below 2**63 so it stays an int64"""
+    x = ((x ^ (x >> 33)) * 0x62A9D9ED799705F5) & MASK63
+    x = ((x ^ (x >> 28)) * 0x4BE98134A5976FD3) & MASK63
+    return x ^ (x >> 32)
+
+
+@njit(cache=True)
+def _bloom_add(bloom, n_bits, key):
+    """Set the key's bits in the Bloom filter; return True if they were all set already"""
+    h1 = _mix(key) >> 1  # < 2**62
+    h2 = (_mix(key ^ 0x5BD1E995) >> 4) | 1  # < 2**59, so h1 + i * h2 < 2**63
+    seen = True
+    for i in range(BLOOM_HASHES):
+        bit = ((h1 + i * h2) & MASK63) % n_bits
+        mask = 1 << (bit & 7)
+        if not bloom[bit >> 3] & mask:
+            seen = False
+            bloom[bit >> 3] |= mask
+    return seen
+
+
+@njit(cache=True)
+def estimate_rtt(ts, src_ip, dst_ip, flags):
+    """
+    Estimate the RTT from SYN -> SYN-ACK times over the TCP packets of a capture
+
+    Args:
+        ts: Packet timestamps in seconds (float64)
+        src_ip: IPv4 source addresses (uint32)
+        dst_ip: IPv4 destination addresses (uint32)
+        flags: TCP flags (uint8)
+
+    Returns:
+        rtt_ms, negative if no handshake was seen
+    """
+    rtt_ms = -1.0
+    syn_times = {}  # Track SYN for RTT estimation, keyed by (src, dst)
+
+    for i in range(len(ts)):
+        src = int(src_ip[i])
+        dst = int(dst_ip[i])
+        pkt_flags = flags[i]
+
+        if pkt_flags & TH_SYN and not (pkt_flags & TH_ACK):  # SYN without ACK
+            syn_times[(src << 32) | dst] = ts[i]
+        elif pkt_flags & (TH_SYN | TH_ACK):  # SYN-ACK
+            key = (dst << 32) | src
+            if key in syn_times:
+                rtt_estimate = (ts[i] - syn_times[key]) * 1000  # ms
+                if rtt_ms < 0:
+                    rtt_ms = rtt_estimate
+                else:
+                    rtt_ms = (rtt_ms + rtt_estimate) / 2  # Average RTT
+
+    return rtt_ms
+
+
+def bloom_bits(num_keys):
+    """Bloom filter size in bits for num_keys keys at a 1% false-positive rate"""
+    return max(64, int(num_keys * BLOOM_BITS_PER_KEY))
+
+
+@njit(cache=True)
+def count_retransmissions(flow, seq, n_bits=0):
+    """
+    Count packets whose sequence number was already seen on the same flow
+
+    Only needs every packet of a flow to be in the same call, so flows can be
+    split across workers and the counts summed.
+
+    Args:
+        flow: Id of the packet's (src, dst, sport, dport) flow (uint32)
+        seq: TCP sequence numbers (uint32)
+        n_bits: Bloom filter size in bits (see bloom_bits), or 0 for an exact set
+    """
+    retransmissions = 0
+    seq_nums = set()
+
+    use_bloom = n_bits > 0
+    bloom = np.zeros((n_bits + 7) // 8, dtype=np.uint8)
+
+    for i in range(len(seq)):
+        key = (int(flow[i]) << 32) | int(seq[i])
+        if use_bloom:
+            if _bloom_add(bloom, n_bits, key):
+                retransmissions += 1
+        elif key in seq_nums:
+            retransmissions += 1
+        else:
+            seq_nums.add(key)
+
+    return retransmissions
+
+
+if __name__ == "__main__":
+    # Check that the compiled kernels agree with their plain-Python versions
+    if not hasattr(count_retransmissions, 'py_func'):
+        print("numba not installed, nothing to compare")
+        sys.exit(0)
+
+    rng = np.random.default_rng(0)
+    n = 200000
+    flow = rng.integers(0, 20, n).astype(np.uint32)
+    seq = rng.integers(0, 1 << 20, n).astype(np.uint32)
+    ts = np.sort(rng.random(n))
+    hosts = np.array([0xC0A80001, 0xC0A80002, 0x0A000001, 0x0A000002], dtype=np.uint32)
+    src = hosts[rng.integers(0, 4, n)]
+    dst = hosts[rng.integers(0, 4, n)]
+    flags = rng.choice(np.array([TH_SYN, TH_SYN | TH_ACK, TH_ACK], dtype=np.uint8), n)
+
+    checks = [
+        ('exact retransmissions', count_retransmissions, (flow, seq, 0)),
+        ('bloom retransmissions', count_retransmissions, (flow, seq, bloom_bits(n))),
+        ('rtt', estimate_rtt, (ts, src, dst, flags)),
+    ]
+    failed = False
+    for name, kernel, args in checks:
+        compiled, python = kernel(*args), kernel.py_func(*args)
+        print(f"{name}: numba={compiled} python={python}")
+        failed |= compiled != python
+    sys.exit(1 if failed else 0)
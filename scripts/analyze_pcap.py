@@ -1,71 +1,209 @@
 import sys
-from scapy.all import rdpcap, TCP, UDP, IP
+import mmap
+import struct
+from array import array
+import dpkt
+import numpy as np
 import os
 import csv
+from concurrent.futures import ProcessPoolExecutor
+from _analyze_numba import BLOOM_MIN_PACKETS, bloom_bits, count_retransmissions, estimate_rtt
 
-def analyze_pcap(pcap_path, protocol):
-    packets = rdpcap(pcap_path)
-    if not packets:
-        print("No packets in pcap")
+# pcap link types whose frames we can walk to the IPv4 header: (header length, offset of the ethertype)
+LINK_LAYERS = {1: (14, 12), 113: (16, 14)}  # Ethernet, Linux cooked
+ETH_TYPE_IP = 0x0800
+IPPROTO_TCP = 6
+IPV4_HEADER = struct.Struct('!B5xH1xB2xII')  # ver/ihl, frag, proto, src, dst
+TCP_SEQ = struct.Struct('!I')
+FLOW_KEY = struct.Struct('!4s4sHH')  # src, dst, sport, dport as on the wire
+LINK_DECODERS = {1: dpkt.ethernet.Ethernet, 113: dpkt.sll.SLL}  # dpkt classes for LINK_LAYERS
+# Below this many TCP packets, worker start-up costs more than the sharded count saves
+PARALLEL_MIN_TCP_PACKETS = 1 << 20
+
+def _tcp_columns():
+    """Per-TCP-packet columns (ts, src, dst, flow, seq, flags) handed to the compiled TCP pass"""
+    return array('d'), array('I'), array('I'), array('I'), array('I'), array('B')
+
+def _read_pcap(pcap_path, is_tcp):
+    """Return (total_bytes, timestamps, tcp_columns) for a capture using dpkt"""
+    total_bytes = 0
+    timestamps = array('d')
+    tcp_ts, tcp_src, tcp_dst, tcp_flow, tcp_seq, tcp_flags = tcp_columns = _tcp_columns()
+    flows = {}  # packed (src, dst, sport, dport) -> flow id
+
+    # Stream the capture instead of loading it whole: dpkt only decodes the
+    # headers we touch, which is far cheaper than full scapy dissection
+    with open(pcap_path, 'rb') as f:
+        reader = dpkt.pcap.Reader(f)
+        link_layer = LINK_DECODERS.get(reader.datalink())
+        if is_tcp and link_layer is None:
+            raise ValueError(f"{pcap_path}: unsupported link type {reader.datalink()}")
+
+        for ts, buf in reader:
+            total_bytes += len(buf)
+            timestamps.append(ts)
+
+            if not is_tcp:
+                continue
+
+            try:
+                ip = link_layer(buf).data
+            except dpkt.UnpackError:
+                continue  # frame shorter than its headers
+            if not isinstance(ip, dpkt.ip.IP) or not isinstance(ip.data, dpkt.tcp.TCP):
+                continue
+            tcp = ip.data
+            flow_key = FLOW_KEY.pack(ip.src, ip.dst, tcp.sport, tcp.dport)
+            tcp_ts.append(ts)
+            tcp_src.append(int.from_bytes(ip.src, 'big'))
+            tcp_dst.append(int.from_bytes(ip.dst, 'big'))
+            tcp_flow.append(flows.setdefault(flow_key, len(flows)))
+            tcp_seq.append(tcp.seq)
+            tcp_flags.append(tcp.flags)
+
+    return total_bytes, timestamps, tcp_columns
+
+def _read_pcap_mmap(pcap_path, is_tcp):
+    """
+    Same as _read_pcap, but scans the memory-mapped file directly
+
+    Walks the 16-byte record headers by offset and reads the IPv4/TCP fields
+    with struct at fixed positions, so no per-packet objects are created.
+    Only classic pcap files (not pcapng) are supported.
+    """
+    total_bytes = 0
+    timestamps = array('d')
+    tcp_ts, tcp_src, tcp_dst, tcp_flow, tcp_seq, tcp_flags = tcp_columns = _tcp_columns()
+    flows = {}  # packed (src, dst, sport, dport) -> flow id
+
+    with open(pcap_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < 24:
+            return total_bytes, timestamps, tcp_columns
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            magic = mm[:4]
+            if magic in (b'\xd4\xc3\xb2\xa1', b'\x4d\x3c\xb2\xa1'):
+                endian = '<'
+            elif magic in (b'\xa1\xb2\xc3\xd4', b'\xa1\xb2\x3c\x4d'):
+                endian = '>'
+            else:
+                raise ValueError(f"{pcap_path} is not a pcap file")
+            ts_scale = 1e-9 if magic in (b'\x4d\x3c\xb2\xa1', b'\xa1\xb2\x3c\x4d') else 1e-6
+            record = struct.Struct(endian + 'IIII')
+            linktype = struct.unpack_from(endian + 'I', mm, 20)[0] & 0x0FFFFFFF
+            if is_tcp and linktype not in LINK_LAYERS:
+                raise ValueError(f"{pcap_path}: unsupported link type {linktype}")
+            link_len, type_offset = LINK_LAYERS.get(linktype, (0, 0))  # only read for TCP
+
+            off = 24
+            while off + 16 <= size:
+                ts_sec, ts_frac, incl_len, _ = record.unpack_from(mm, off)
+                pkt = off + 16
+                off = pkt + incl_len
+                if off > size:
+                    break  # truncated last record
+                ts = ts_sec + ts_frac * ts_scale
+                total_bytes += incl_len
+                timestamps.append(ts)
+
+                if not is_tcp or incl_len < link_len + 20:
+                    continue
+                ip = pkt + link_len
+                if (mm[pkt + type_offset] << 8 | mm[pkt + type_offset + 1]) != ETH_TYPE_IP:
+                    continue
+                ver_ihl, frag, proto, src, dst = IPV4_HEADER.unpack_from(mm, ip)
+                tcp = ip + (ver_ihl & 0x0F) * 4
+                if ver_ihl >> 4 != 4 or proto != IPPROTO_TCP or frag & 0x1FFF or tcp + 14 > off:
+                    continue
+                flow_key = mm[ip + 12:ip + 20] + mm[tcp:tcp + 4]
+                tcp_ts.append(ts)
+                tcp_src.append(src)
+                tcp_dst.append(dst)
+                tcp_flow.append(flows.setdefault(flow_key, len(flows)))
+                tcp_seq.append(TCP_SEQ.unpack_from(mm, tcp + 4)[0])
+                tcp_flags.append(mm[tcp + 13])
+
+    return total_bytes, timestamps, tcp_columns
+
+def _count_shard(flow, seq, use_bloom):
+    # Plain module-level wrapper so workers import the kernel (and its numba
+    # cache) instead of unpickling the dispatcher. The filter is sized for the
+    # shard, so the false-positive rate does not depend on the shard count
+    return count_retransmissions(flow, seq, bloom_bits(len(seq)) if use_bloom else 0)
+
+def _count_retransmissions_sharded(tcp_flow, tcp_seq, use_bloom, max_workers=None):
+    """
+    Count retransmissions with the flows spread over worker processes
+
+    Retransmissions are detected per flow, so flows are assigned to shards by
+    id and each shard is counted independently. use_bloom is decided once for
+    the whole capture; max_workers caps the pool (default: one worker per CPU).
+    """
+    flow = np.frombuffer(tcp_flow, dtype=np.uint32)
+    seq = np.frombuffer(tcp_seq, dtype=np.uint32)
+    num_shards = min(max_workers or os.cpu_count() or 1, int(flow.max()) + 1)
+    if num_shards < 2:
+        return _count_shard(flow, seq, use_bloom)
+
+    # Group the packets by shard with one stable sort (keeps each flow's
+    # packets in capture order), then cut at the shard boundaries
+    shard_of = flow % num_shards
+    order = np.argsort(shard_of, kind='stable')
+    bounds = np.cumsum(np.bincount(shard_of, minlength=num_shards))[:-1]
+    with ProcessPoolExecutor(max_workers=num_shards) as executor:
+        counts = executor.map(_count_shard, np.split(flow[order], bounds), np.split(seq[order], bounds),
+                              [use_bloom] * num_shards)
+        return sum(counts)
+
+def analyze_pcap(pcap_path, protocol, verbose=True, fast=False, max_workers=None):
+    is_tcp = protocol.lower() == 'tcp'
+
+    retransmissions = 0
+    loss_estimate = 0
+    rtt_ms = 'N/A'
+
+    read = _read_pcap_mmap if fast else _read_pcap
+    total_bytes, timestamps, tcp_columns = read(pcap_path, is_tcp)
+    total_packets = len(timestamps)
+
+    if not total_packets:
+        if verbose:
+            print("No packets in pcap")
         return {}
 
-    start_time = packets[0].time
-    end_time = packets[-1].time
+    start_time = timestamps[0]
+    end_time = timestamps[-1]
     duration = end_time - start_time
     if duration == 0:
         duration = 1  # avoid div by zero
 
-    total_bytes = sum(len(pkt) for pkt in packets)
     bandwidth_mbps = (total_bytes * 8) / (duration * 1000000)  # Mbps
 
     # Calculate jitter (variation in packet arrival times)
     jitter_ms = 0
-    if len(packets) > 1:
-        inter_arrival_times = []
-        for i in range(1, len(packets)):
-            inter_arrival_times.append((packets[i].time - packets[i-1].time) * 1000)  # Convert to ms
-        if len(inter_arrival_times) > 1:
-            # Jitter is the average deviation in inter-arrival times
-            mean_iat = sum(inter_arrival_times) / len(inter_arrival_times)
-            jitter_ms = sum(abs(iat - mean_iat) for iat in inter_arrival_times) / len(inter_arrival_times)
+    if total_packets > 2:
+        # Jitter is the average deviation in inter-arrival times
+        inter_arrival_times = np.diff(np.frombuffer(timestamps, dtype=np.float64)) * 1000  # Convert to ms
+        jitter_ms = float(np.abs(inter_arrival_times - inter_arrival_times.mean()).mean())
 
-    retransmissions = 0
-    loss_estimate = 0
-    rtt_ms = 'N/A'
+    if is_tcp:
+        tcp_ts, tcp_src, tcp_dst, tcp_flow, tcp_seq, tcp_flags = tcp_columns
+        total_tcp_packets = len(tcp_ts)
+        # Exact set or Bloom filter is chosen from the whole capture, so the
+        # result does not depend on how many shards it is split into
+        use_bloom = total_tcp_packets > BLOOM_MIN_PACKETS
+        if total_tcp_packets >= PARALLEL_MIN_TCP_PACKETS:
+            retransmissions = _count_retransmissions_sharded(tcp_flow, tcp_seq, use_bloom, max_workers)
+        else:
+            retransmissions = _count_shard(tcp_flow, tcp_seq, use_bloom)
+        rtt_estimate = estimate_rtt(tcp_ts, tcp_src, tcp_dst, tcp_flags)
+        if rtt_estimate >= 0:
+            rtt_ms = rtt_estimate
 
-    if protocol.lower() == 'tcp':
-        seq_nums = {}
-        syn_ack_times = {}  # Track SYN-ACK for RTT estimation
-        
-        for pkt in packets:
-            if TCP in pkt and IP in pkt:
-                src = pkt[IP].src
-                dst = pkt[IP].dst
-                seq = pkt[TCP].seq
-                ack = pkt[TCP].ack
-                flags = pkt[TCP].flags
-                
-                # RTT estimation: SYN -> SYN-ACK time
-                if flags & 0x02 and not (flags & 0x10):  # SYN without ACK
-                    syn_ack_times[(src, dst)] = pkt.time
-                elif flags & 0x12:  # SYN-ACK
-                    key = (dst, src)
-                    if key in syn_ack_times:
-                        rtt_estimate = (pkt.time - syn_ack_times[key]) * 1000  # ms
-                        if rtt_ms == 'N/A':
-                            rtt_ms = rtt_estimate
-                        else:
-                            rtt_ms = (rtt_ms + rtt_estimate) / 2  # Average RTT
-                
-                # Retransmission detection
-                key = (src, dst, seq)
-                if key in seq_nums:
-                    retransmissions += 1
-                else:
-                    seq_nums[key] = True
-        
         # Rough loss estimate: retransmissions / total packets
-        total_tcp_packets = sum(1 for pkt in packets if TCP in pkt)
         if total_tcp_packets > 0:
             loss_estimate = (retransmissions / total_tcp_packets) * 100
     elif protocol.lower() == 'udp':
@@ -75,7 +213,7 @@ def analyze_pcap(pcap_path, protocol):
 
     metrics = {
         'duration_seconds': duration,
-        'total_packets': len(packets),
+        'total_packets': total_packets,
         'total_bytes': total_bytes,
         'bandwidth_mbps': bandwidth_mbps,
         'jitter_ms': jitter_ms,
@@ -84,20 +222,29 @@ def analyze_pcap(pcap_path, protocol):
         'estimated_loss_percent': loss_estimate
     }
 
-    print(f"Duration: {duration:.2f} seconds")
-    print(f"Total packets: {len(packets)}")
-    print(f"Total bytes: {total_bytes}")
-    print(f"Bandwidth: {bandwidth_mbps:.2f} Mbps")
-    print(f"Jitter: {jitter_ms:.2f} ms")
-    print(f"RTT: {rtt_ms if rtt_ms == 'N/A' else f'{rtt_ms:.2f} ms'}")
-    print(f"Retransmissions: {retransmissions}")
-    print(f"Estimated loss: {loss_estimate}%")
+    if verbose:
+        print_metrics(metrics)
 
     return metrics
 
+def print_metrics(metrics):
+    rtt_ms = metrics['rtt_ms']
+    print(f"Duration: {metrics['duration_seconds']:.2f} seconds")
+    print(f"Total packets: {metrics['total_packets']}")
+    print(f"Total bytes: {metrics['total_bytes']}")
+    print(f"Bandwidth: {metrics['bandwidth_mbps']:.2f} Mbps")
+    print(f"Jitter: {metrics['jitter_ms']:.2f} ms")
+    print(f"RTT: {rtt_ms if rtt_ms == 'N/A' else f'{rtt_ms:.2f} ms'}")
+    print(f"Retransmissions: {metrics['retransmissions']}")
+    print(f"Estimated loss: {metrics['estimated_loss_percent']}%")
+
 if __name__ == "__main__":
+    # --fast: scan the memory-mapped pcap directly instead of going through dpkt
+    fast = '--fast' in sys.argv
+    if fast:
+        sys.argv.remove('--fast')
     if len(sys.argv) < 3:
-        print("Usage: python analyze_pcap.py <protocol> <client_pcap> [server_pcap] [csv_path]")
+        print("Usage: python analyze_pcap.py [--fast] <protocol> <client_pcap> [server_pcap] [csv_path]")
         sys.exit(1)
     protocol = sys.argv[1]
     client_pcap = sys.argv[2]
@@ -115,8 +262,26 @@ if __name__ == "__main__":
     else:
         protocol_name = protocol.upper()
     
-    client_metrics = analyze_pcap(client_pcap, protocol)
-    server_metrics = analyze_pcap(server_pcap, protocol) if server_pcap and os.path.exists(server_pcap) else None
+    # Client and server captures are independent, so analyze them side by side
+    # and print the results afterwards to keep the output in order. Each
+    # analysis gets its share of the CPUs for the sharded retransmission count
+    has_server = bool(server_pcap and os.path.exists(server_pcap))
+    if has_server:
+        shard_workers = max(1, (os.cpu_count() or 1) // 2)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            client_future = executor.submit(analyze_pcap, client_pcap, protocol, False, fast, shard_workers)
+            server_future = executor.submit(analyze_pcap, server_pcap, protocol, False, fast, shard_workers)
+            client_metrics = client_future.result()
+            server_metrics = server_future.result()
+    else:
+        client_metrics = analyze_pcap(client_pcap, protocol, False, fast)
+        server_metrics = None
+
+    for pcap_path, metrics in ((client_pcap, client_metrics), (server_pcap, server_metrics)):
+        if metrics:
+            print_metrics(metrics)
+        elif metrics is not None:
+            print(f"No packets in {pcap_path}")
     
     if csv_path:
         with open(csv_path, 'w', newline='') as csvfile:
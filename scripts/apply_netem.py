@@ -1,4 +1,5 @@
 import os
+import shlex
 import subprocess
 
 def get_env(key, default=None):
@@ -7,7 +8,7 @@ def get_env(key, default=None):
         return default
     return value
 
-def build_tc_command():
+def build_tc_command(handle=None):
     delay = get_env('DELAY')
     jitter = get_env('JITTER')
     loss = get_env('LOSS')
@@ -16,45 +17,56 @@ def build_tc_command():
     netem = []
     if delay:
         if jitter:
-            netem.append(f"delay {delay} {jitter}")
+            netem += ['delay', delay, jitter]
         else:
-            netem.append(f"delay {delay}")
+            netem += ['delay', delay]
     if loss:
-        netem.append(f"loss {loss}")
+        netem += ['loss', loss]
     if netem:
-        cmd = f"tc qdisc replace dev {iface} root netem {' '.join(netem)}"
-        return cmd
+        cmd = ['tc', 'qdisc', 'replace', 'dev', iface, 'root']
+        if handle:
+            cmd += ['handle', handle]
+        return cmd + ['netem'] + netem
     return None
 
-def build_tbf_command():
+def build_tbf_command(parent=None, handle=None):
     bandwidth = get_env('BANDWIDTH')
     iface = 'eth0'
     if bandwidth:
+        cmd = ['tc', 'qdisc', 'replace', 'dev', iface]
+        cmd += ['parent', parent, 'handle', handle] if parent else ['root']
         # Use 32kB burst and 400ms latency as defaults
-        return f"tc qdisc replace dev {iface} root tbf rate {bandwidth} burst 32kbit latency 400ms"
+        return cmd + ['tbf', 'rate', bandwidth, 'burst', '32kbit', 'latency', '400ms']
     return None
 
+def run_tc_batch(commands):
+    # One tc process for all commands; -force keeps going past errors such as
+    # deleting a root qdisc that does not exist
+    batch = ''.join(' '.join(cmd[1:]) + '\n' for cmd in commands)
+    try:
+        subprocess.run(['tc', '-force', '-batch', '-'], input=batch.encode(), check=False,
+                       stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+    except FileNotFoundError:
+        print("tc not found, skipping")
+
 def apply_netem():
     # Remove any existing qdisc
-    subprocess.run("tc qdisc del dev eth0 root", shell=True, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+    commands = [['tc', 'qdisc', 'del', 'dev', 'eth0', 'root']]
     tc_cmd = build_tc_command()
     tbf_cmd = build_tbf_command()
-    print(f"Applying netem: {tc_cmd}")
-    print(f"Applying tbf: {tbf_cmd}")
+    print(f"Applying netem: {shlex.join(tc_cmd) if tc_cmd else None}")
+    print(f"Applying tbf: {shlex.join(tbf_cmd) if tbf_cmd else None}")
     if tc_cmd and tbf_cmd:
         # Combine: netem as root with handle 1:, tbf as child
-        netem_cmd = tc_cmd.replace("root netem", "root handle 1: netem")
-        print(f"Running: {netem_cmd}")
-        subprocess.run(netem_cmd, shell=True, check=False, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-        tbf_cmd_modified = tbf_cmd.replace("root tbf", "parent 1: handle 10: tbf")
-        print(f"Running: {tbf_cmd_modified}")
-        subprocess.run(tbf_cmd_modified, shell=True, check=False, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        commands.append(build_tc_command(handle='1:'))
+        commands.append(build_tbf_command(parent='1:', handle='10:'))
     elif tc_cmd:
-        print(f"Running: {tc_cmd}")
-        subprocess.run(tc_cmd, shell=True, check=False, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        commands.append(tc_cmd)
     elif tbf_cmd:
-        print(f"Running: {tbf_cmd}")
-        subprocess.run(tbf_cmd, shell=True, check=False, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+        commands.append(tbf_cmd)
+    for cmd in commands[1:]:
+        print(f"Running: {shlex.join(cmd)}")
+    run_tc_batch(commands)
 
 if __name__ == "__main__":
     apply_netem()
@@ -3,11 +3,17 @@ import sys
 import time
 import os
 import signal
-import json
+import orjson
 import csv
+from array import array
 from datetime import datetime
-from scapy.all import sniff, TCP, UDP, IP
+import pcap
 import threading
+import numpy as np
+
+# Link-layer header length per pcap datalink type (Ethernet, Linux cooked)
+LINK_HEADER_LEN = {1: 14, 113: 16}
+IPPROTO_TCP = 6
 
 class LiveMetricsCollector:
     def __init__(self, protocol, iface, port, json_path):
@@ -17,60 +23,60 @@ class LiveMetricsCollector:
         self.json_path = json_path
         self.metrics_per_second = []
         self.current_second_data = {
-            'packets': [],
+            'times': array('d'),  # packet arrival times, packed as C doubles
             'bytes': 0,
             'retrans': 0,
-            'seq_nums': {}
+            'seq_nums': set()
         }
         self.start_time = None
         self.current_second = 0
         self.running = True
-        self.lock = threading.Lock()
+        self.link_header_len = 14
         
-    def packet_callback(self, pkt):
+    def packet_callback(self, ts, pkt):
         if not self.running:
-            return False  # Stop sniffing
+            return
             
-        current_time = time.time()
+        current_time = ts
         if self.start_time is None:
             self.start_time = current_time
             
         elapsed = current_time - self.start_time
         second = int(elapsed)
         
-        with self.lock:
-            # If second changed, save metrics from previous second
-            if second > self.current_second:
-                self._save_second_metrics()
-                self.current_second = second
-
-            # Process current packet
-            pkt_size = len(pkt)
-            self.current_second_data['packets'].append({
-                'time': current_time,
-                'size': pkt_size
-            })
-            self.current_second_data['bytes'] += pkt_size
+        # If second changed, save metrics from previous second
+        if second > self.current_second:
+            self._save_second_metrics()
+            self.current_second = second
+
+        # Process current packet
+        pkt_size = len(pkt)
+        self.current_second_data['times'].append(current_time)
+        self.current_second_data['bytes'] += pkt_size
+        
+        # Detecta retransmissões (TCP)
+        ip_start = self.link_header_len
+        if (self.protocol.lower() == 'tcp' and len(pkt) >= ip_start + 20
+                and pkt[ip_start] >> 4 == 4 and pkt[ip_start + 9] == IPPROTO_TCP):
+            ip_end = ip_start + (pkt[ip_start] & 0x0F) * 4
+            if len(pkt) < ip_end + 8:
+                return
+            # src, dst, sport, dport, seq as on the wire: parallel streams
+            # between the same hosts reuse sequence numbers
+            key = pkt[ip_start + 12:ip_start + 20] + pkt[ip_end:ip_end + 8]
             
-            # Detecta retransmissões (TCP)
-            if self.protocol.lower() == 'tcp' and TCP in pkt and IP in pkt:
-                src = pkt[IP].src
-                dst = pkt[IP].dst
-                seq = pkt[TCP].seq
-                key = (src, dst, seq)
-                
-                if key in self.current_second_data['seq_nums']:
-                    self.current_second_data['retrans'] += 1
-                else:
-                    self.current_second_data['seq_nums'][key] = True
+            if key in self.current_second_data['seq_nums']:
+                self.current_second_data['retrans'] += 1
+            else:
+                self.current_second_data['seq_nums'].add(key)
     
     def _save_second_metrics(self):
         """Save metrics for the current second"""
-        if not self.current_second_data['packets']:
+        if not self.current_second_data['times']:
             return
 
-        packets = self.current_second_data['packets']
-        num_packets = len(packets)
+        times = np.frombuffer(self.current_second_data['times'], dtype=np.float64)
+        num_packets = len(times)
         total_bytes = self.current_second_data['bytes']
 
         # Calculate bandwidth (Mbps) for this second
@@ -79,14 +85,8 @@ class LiveMetricsCollector:
         # Calculate jitter (variation in packet arrival times)
         jitter_ms = 0
         if num_packets > 1:
-            inter_arrival_times = []
-            for i in range(1, len(packets)):
-                iat = (packets[i]['time'] - packets[i-1]['time']) * 1000  # ms
-                inter_arrival_times.append(iat)
-
-            if inter_arrival_times:
-                mean_iat = sum(inter_arrival_times) / len(inter_arrival_times)
-                jitter_ms = sum(abs(iat - mean_iat) for iat in inter_arrival_times) / len(inter_arrival_times)
+            inter_arrival_times = np.diff(times) * 1000  # ms
+            jitter_ms = float(np.abs(inter_arrival_times - inter_arrival_times.mean()).mean())
 
         # Calculate loss rate
         loss_percent = 0
@@ -108,25 +108,35 @@ class LiveMetricsCollector:
 
         # Reset for next second
         self.current_second_data = {
-            'packets': [],
+            'times': array('d'),
             'bytes': 0,
             'retrans': 0,
-            'seq_nums': {}
+            'seq_nums': set()
         }
     
     def start_capture(self):
         """Start packet capture in a separate thread"""
         def capture_thread():
-            # Filter packets by specified port
+            # Filter packets by specified port; only IPv4 is analysed, so let
+            # the kernel drop IPv6/ARP before they reach the callback
             if self.protocol.lower() == 'tcp':
-                filter_str = f'tcp port {self.port}'
+                filter_str = f'ip and tcp port {self.port}'
             elif self.protocol.lower() == 'udp':
-                filter_str = f'udp port {self.port}'
+                filter_str = f'ip and udp port {self.port}'
             else:
-                filter_str = f'port {self.port}'
+                filter_str = f'ip and port {self.port}'
+
+            pc = pcap.pcap(name=self.iface, promisc=True, immediate=True, timeout_ms=50)
+            pc.setfilter(filter_str)
+            self.link_header_len = LINK_HEADER_LEN.get(pc.datalink(), 14)
 
-            sniff(iface=self.iface, filter=filter_str, prn=self.packet_callback,
-                  stop_filter=lambda x: not self.running, store=False)
+            # dispatch() returns at each read timeout, so the running flag is rechecked
+            while self.running:
+                pc.dispatch(-1, self.packet_callback)
+
+            # Save metrics for last second if any; done here so the per-second
+            # data is never touched from another thread
+            self._save_second_metrics()
 
         self.capture_thread = threading.Thread(target=capture_thread, daemon=True)
         self.capture_thread.start()
@@ -134,12 +144,12 @@ class LiveMetricsCollector:
     def stop_capture(self):
         """Stop capture and save final metrics"""
         self.running = False
-        time.sleep(1)  # Wait for thread to finish
-
-        with self.lock:
-            # Save metrics for last second if any
-            if self.current_second_data['packets']:
-                self._save_second_metrics()
+        # The capture thread is the only writer of the per-second data and
+        # flushes the last second itself, so wait for it before saving
+        self.capture_thread.join(timeout=5)
+        if self.capture_thread.is_alive():
+            print("Capture thread still running, waiting for it to finish...")
+            self.capture_thread.join()
 
         # Save complete JSON
         self._save_json()
@@ -155,8 +165,8 @@ class LiveMetricsCollector:
             'summary': self._calculate_summary()
         }
         
-        with open(self.json_path, 'w') as f:
-            json.dump(output, f, indent=2)
+        with open(self.json_path, 'wb') as f:
+            f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         
         print(f"JSON metrics saved to {self.json_path}")
 
@@ -165,12 +175,21 @@ class LiveMetricsCollector:
         if not self.metrics_per_second:
             return {}
 
-        total_packets = sum(m['packets'] for m in self.metrics_per_second)
-        total_bytes = sum(m['bytes'] for m in self.metrics_per_second)
-        avg_bandwidth = sum(m['bandwidth_mbps'] for m in self.metrics_per_second) / len(self.metrics_per_second)
-        avg_jitter = sum(m['jitter_ms'] for m in self.metrics_per_second) / len(self.metrics_per_second)
-        total_retrans = sum(m['retransmissions'] for m in self.metrics_per_second)
-        avg_loss = sum(m['loss_percent'] for m in self.metrics_per_second) / len(self.metrics_per_second)
+        # Accumulate every total in a single pass over the per-second entries
+        total_packets = total_bytes = total_retrans = 0
+        sum_bandwidth = sum_jitter = sum_loss = 0.0
+        for m in self.metrics_per_second:
+            total_packets += m['packets']
+            total_bytes += m['bytes']
+            total_retrans += m['retransmissions']
+            sum_bandwidth += m['bandwidth_mbps']
+            sum_jitter += m['jitter_ms']
+            sum_loss += m['loss_percent']
+
+        num_seconds = len(self.metrics_per_second)
+        avg_bandwidth = sum_bandwidth / num_seconds
+        avg_jitter = sum_jitter / num_seconds
+        avg_loss = sum_loss / num_seconds
 
         return {
             'total_packets': total_packets,
@@ -184,8 +203,8 @@ class LiveMetricsCollector:
 
 def generate_timeline_csv(json_path, timeline_csv_path):
     """Generate a CSV with only per-second metrics (timeline)"""
-    with open(json_path, 'r') as f:
-        data = json.load(f)
+    with open(json_path, 'rb') as f:
+        data = orjson.loads(f.read())
 
     with open(timeline_csv_path, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
@@ -195,8 +214,8 @@ def generate_timeline_csv(json_path, timeline_csv_path):
                         'Jitter (ms)', 'Retransmissions', 'Loss (%)'])
 
         # Per-second data (timeline only, no summary)
-        for metric in data['metrics_per_second']:
-            writer.writerow([
+        writer.writerows([
+            [
                 metric['second'],
                 metric['timestamp'],
                 metric['packets'],
@@ -205,7 +224,9 @@ def generate_timeline_csv(json_path, timeline_csv_path):
                 metric['jitter_ms'],
                 metric['retransmissions'],
                 metric['loss_percent']
-            ])
+            ]
+            for metric in data['metrics_per_second']
+        ])
 
     print(f"Timeline CSV saved to {timeline_csv_path}")
 
@@ -213,9 +234,9 @@ def generate_timeline_csv(json_path, timeline_csv_path):
 def generate_summary_csv(json_path, summary_csv_path):
     """Generate a CSV with only summary statistics (summary)"""
     try:
-        with open(json_path, 'r') as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+        with open(json_path, 'rb') as f:
+            data = orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
         data = {}
 
     with open(summary_csv_path, 'w', newline='') as csvfile:
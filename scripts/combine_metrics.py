@@ -2,10 +2,17 @@
 """
 Script to combine client and server metrics into a single summary CSV
 """
-import json
+import orjson
 import csv
 import sys
 import os
+import platform
+import time
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
 
 def combine_metrics(client_json_path, server_json_path, output_csv_path):
     """
@@ -17,11 +24,11 @@ def combine_metrics(client_json_path, server_json_path, output_csv_path):
         output_csv_path: Path to the combined CSV
     """
     # Read the JSONs
-    with open(client_json_path, 'r') as f:
-        client_data = json.load(f)
+    with open(client_json_path, 'rb') as f:
+        client_data = orjson.loads(f.read())
 
-    with open(server_json_path, 'r') as f:
-        server_data = json.load(f)
+    with open(server_json_path, 'rb') as f:
+        server_data = orjson.loads(f.read())
 
     client_summary = client_data.get('summary', {})
     server_summary = server_data.get('summary', {})
@@ -170,7 +177,12 @@ def combine_metrics(client_json_path, server_json_path, output_csv_path):
 
 def wait_for_file(filepath, timeout=60, check_interval=1):
     """Wait for a file to be created"""
-    import time
+    if platform.system() == 'Linux' and INotify is not None:
+        try:
+            return _wait_for_file_inotify(filepath, timeout)
+        except OSError:
+            pass  # e.g. parent directory missing, fall back to polling
+
     elapsed = 0
     while elapsed < timeout:
         if os.path.exists(filepath):
@@ -180,6 +192,27 @@ def wait_for_file(filepath, timeout=60, check_interval=1):
     return False
 
 
+def _wait_for_file_inotify(filepath, timeout):
+    """Block on inotify events for the file's directory instead of polling"""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    name = os.path.basename(filepath)
+    deadline = time.monotonic() + timeout
+
+    with INotify() as inotify:
+        inotify.add_watch(directory, flags.CLOSE_WRITE | flags.MOVED_TO)
+        # Check after the watch is in place so a file created meanwhile is not missed
+        if os.path.exists(filepath):
+            return True
+
+        remaining = timeout
+        while remaining > 0:
+            for event in inotify.read(timeout=int(remaining * 1000)):
+                if event.name == name:
+                    return True
+            remaining = deadline - time.monotonic()
+    return False
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 4:
         print("Usage: python combine_metrics.py <client_json> <server_json> <output_csv>")
@@ -6,6 +6,50 @@ import json
 import csv
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+from pathlib import Path
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def read_json(json_path):
+    """Parse a JSON file, with orjson when it is installed"""
+    data = Path(json_path).read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Per-second values in timeline column order, fetched in a single call
+TIMELINE_VALUES = itemgetter('second', 'timestamp', 'packets', 'bytes', 'bandwidth_mbps',
+                             'jitter_ms', 'retransmissions', 'loss_percent')
+
+
+def _timeline_row(metric):
+    """CSV row for one per-second entry"""
+    try:
+        return TIMELINE_VALUES(metric)
+    except KeyError:
+        # Older files may lack some keys
+        return [
+            metric.get('second', 0),
+            metric.get('timestamp', ''),
+            metric.get('packets', 0),
+            metric.get('bytes', 0),
+            metric.get('bandwidth_mbps', 0),
+            metric.get('jitter_ms', 0),
+            metric.get('retransmissions', 0),
+            metric.get('loss_percent', 0)
+        ]
+
 
 def json_to_timeline_csv(json_path, timeline_csv_path):
     """
@@ -15,30 +59,20 @@ def json_to_timeline_csv(json_path, timeline_csv_path):
         json_path: Path to the input JSON file
         timeline_csv_path: Path to the timeline CSV file
     """
-    # Read the JSON
-    with open(json_path, 'r') as f:
-        data = json.load(f)
-
-    # Write the timeline CSV
-    with open(timeline_csv_path, 'w', newline='') as csvfile:
+    with open(timeline_csv_path, 'w', newline='', buffering=1 << 20) as csvfile:
         writer = csv.writer(csvfile)
 
         # Header for per-second metrics
         writer.writerow(['Second', 'Timestamp', 'Packets', 'Bytes', 'Bandwidth (Mbps)',
                         'Jitter (ms)', 'Retransmissions', 'Loss (%)'])
 
-        # Per-second data (timeline only, no summary)
-        for metric in data.get('metrics_per_second', []):
-            writer.writerow([
-                metric.get('second', 0),
-                metric.get('timestamp', ''),
-                metric.get('packets', 0),
-                metric.get('bytes', 0),
-                metric.get('bandwidth_mbps', 0),
-                metric.get('jitter_ms', 0),
-                metric.get('retransmissions', 0),
-                metric.get('loss_percent', 0)
-            ])
+        # Per-second data (timeline only, no summary); streamed row by row with
+        # ijson instead of loading the whole JSON, when it is installed
+        if ijson is not None:
+            with open(json_path, 'rb') as f:
+                writer.writerows(map(_timeline_row, ijson.items(f, 'metrics_per_second.item', use_float=True)))
+        else:
+            writer.writerows(map(_timeline_row, read_json(json_path).get('metrics_per_second', [])))
 
     print(f"Timeline CSV generated: {timeline_csv_path}")
     return timeline_csv_path
@@ -53,8 +87,7 @@ def json_to_summary_csv(json_path, summary_csv_path):
         summary_csv_path: Path to the summary CSV file
     """
     # Read the JSON
-    with open(json_path, 'r') as f:
-        data = json.load(f)
+    data = read_json(json_path)
 
     # Write the summary CSV
     with open(summary_csv_path, 'w', newline='') as csvfile:
@@ -77,6 +110,18 @@ def json_to_summary_csv(json_path, summary_csv_path):
     return summary_csv_path
 
 
+def _convert_one(json_path):
+    """Convert one JSON file (a Path) to its timeline and summary CSVs next to it"""
+    timeline_csv_path = json_path.with_name(f'{json_path.stem}_timeline.csv')
+    summary_csv_path = json_path.with_name(f'{json_path.stem}_summary.csv')
+
+    try:
+        json_to_timeline_csv(json_path, timeline_csv_path)
+        json_to_summary_csv(json_path, summary_csv_path)
+    except Exception as e:
+        print(f"Error converting {json_path.name}: {e}")
+
+
 def batch_convert(results_dir='./results'):
     """
     Convert all JSON files in the results directory to CSVs (timeline and summary)
@@ -88,25 +133,17 @@ def batch_convert(results_dir='./results'):
         print(f"Directory not found: {results_dir}")
         return
 
-    json_files = [f for f in os.listdir(results_dir) if f.endswith('.json')]
+    json_paths = list(Path(results_dir).glob('*.json'))
 
-    if not json_files:
+    if not json_paths:
         print(f"No JSON files found in {results_dir}")
         return
 
-    print(f"Found {len(json_files)} JSON files")
-
-    for json_file in json_files:
-        json_path = os.path.join(results_dir, json_file)
-        base_name = json_file.replace('.json', '')
-        timeline_csv_path = os.path.join(results_dir, f'{base_name}_timeline.csv')
-        summary_csv_path = os.path.join(results_dir, f'{base_name}_summary.csv')
+    print(f"Found {len(json_paths)} JSON files")
 
-        try:
-            json_to_timeline_csv(json_path, timeline_csv_path)
-            json_to_summary_csv(json_path, summary_csv_path)
-        except Exception as e:
-            print(f"Error converting {json_file}: {e}")
+    # Files are independent, so convert them in parallel
+    with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(json_paths))) as executor:
+        list(executor.map(_convert_one, json_paths))
 
 
 if __name__ == "__main__":
@@ -5,10 +5,19 @@ Demonstrates various ways to process the generated JSON data
 """
 import json
 import csv
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
+import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+@lru_cache(maxsize=None)
 def load_metrics(protocol):
-    """Load metrics for a specific protocol"""
+    """Load metrics for a specific protocol (each file is parsed once per run)"""
     # script is in <repo>/scripts/post_processing, results folder is at repo root
     script_dir = Path(__file__).resolve().parent
     results_dir = script_dir.parent.parent / 'results'
@@ -17,8 +26,10 @@ def load_metrics(protocol):
         print(f"File not found: {json_path}")
         return None
 
-    with open(json_path) as f:
-        return json.load(f)
+    data = json_path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def print_summary(protocol):
@@ -51,15 +62,15 @@ def analyze_bandwidth_stability(protocol):
     if not data:
         return
 
-    bandwidths = [m['bandwidth_mbps'] for m in data['metrics_per_second']]
+    metrics = data['metrics_per_second']
+    bandwidths = np.fromiter((m['bandwidth_mbps'] for m in metrics), dtype=np.float64, count=len(metrics))
 
-    min_bw = min(bandwidths)
-    max_bw = max(bandwidths)
-    avg_bw = sum(bandwidths) / len(bandwidths)
+    min_bw = bandwidths.min()
+    max_bw = bandwidths.max()
+    avg_bw = bandwidths.mean()
 
-    # Simple standard deviation
-    variance = sum((bw - avg_bw) ** 2 for bw in bandwidths) / len(bandwidths)
-    std_dev = variance ** 0.5
+    # Population standard deviation
+    std_dev = bandwidths.std()
 
     # Coefficient of variation (CV)
     cv = (std_dev / avg_bw) * 100 if avg_bw > 0 else 0
@@ -90,10 +101,10 @@ def find_problematic_seconds(protocol, threshold_loss=1.0, threshold_jitter=10.0
     if not data:
         return
 
-    problematic = []
-    for metric in data['metrics_per_second']:
-        if metric['loss_percent'] > threshold_loss or metric['jitter_ms'] > threshold_jitter:
-            problematic.append(metric)
+    metrics = data['metrics_per_second']
+    loss = np.fromiter((m['loss_percent'] for m in metrics), dtype=np.float64, count=len(metrics))
+    jitter = np.fromiter((m['jitter_ms'] for m in metrics), dtype=np.float64, count=len(metrics))
+    problematic = [metrics[i] for i in np.flatnonzero((loss > threshold_loss) | (jitter > threshold_jitter))]
 
     print(f"\n{'=' * 60}")
     print(f"PROBLEMATIC SECONDS - {protocol.upper()}")
@@ -161,30 +172,30 @@ def compare_protocols():
 
     print(f"{'-' * 30} {'-' * 12} {'-' * 12} {'-' * 12}\n")
 
+    # Display names, computed once for all rankings
+    proto_name = {protocol: protocol.replace('_client', '').upper() for protocol in results}
+
     # Ranking by bandwidth
     print("🏆 Ranking by Average Bandwidth:")
-    sorted_by_bw = sorted(results.items(), key=lambda x: x[1]['avg_bandwidth_mbps'], reverse=True)
-    for i, (protocol, summary) in enumerate(sorted_by_bw, 1):
-        proto_name = protocol.replace('_client', '').upper()
-        print(f"  {i}. {proto_name:6} - {summary['avg_bandwidth_mbps']:.2f} Mbps")
+    sorted_by_bw = sorted(((s['avg_bandwidth_mbps'], p) for p, s in results.items()), key=itemgetter(0), reverse=True)
+    for i, (bandwidth, protocol) in enumerate(sorted_by_bw, 1):
+        print(f"  {i}. {proto_name[protocol]:6} - {bandwidth:.2f} Mbps")
 
     print()
 
     # Ranking by jitter (lower is better)
     print("🎯 Ranking by Lowest Jitter:")
-    sorted_by_jitter = sorted(results.items(), key=lambda x: x[1]['avg_jitter_ms'])
-    for i, (protocol, summary) in enumerate(sorted_by_jitter, 1):
-        proto_name = protocol.replace('_client', '').upper()
-        print(f"  {i}. {proto_name:6} - {summary['avg_jitter_ms']:.2f} ms")
+    sorted_by_jitter = sorted(((s['avg_jitter_ms'], p) for p, s in results.items()), key=itemgetter(0))
+    for i, (jitter, protocol) in enumerate(sorted_by_jitter, 1):
+        print(f"  {i}. {proto_name[protocol]:6} - {jitter:.2f} ms")
 
     print()
 
     # Ranking by loss (lower is better)
     print("📉 Ranking by Lowest Loss:")
-    sorted_by_loss = sorted(results.items(), key=lambda x: x[1]['avg_loss_percent'])
-    for i, (protocol, summary) in enumerate(sorted_by_loss, 1):
-        proto_name = protocol.replace('_client', '').upper()
-        print(f"  {i}. {proto_name:6} - {summary['avg_loss_percent']:.2f}%")
+    sorted_by_loss = sorted(((s['avg_loss_percent'], p) for p, s in results.items()), key=itemgetter(0))
+    for i, (loss, protocol) in enumerate(sorted_by_loss, 1):
+        print(f"  {i}. {proto_name[protocol]:6} - {loss:.2f}%")
 
     print(f"{'=' * 60}\n")
 
@@ -208,30 +219,28 @@ def export_comparison_csv():
     results_dir = script_dir.parent.parent / 'results'
     csv_path = results_dir / 'protocol_comparison.csv'
 
+    # CSV column -> protocol
+    columns = {'BBR': 'bbr_client', 'CUBIC': 'cubic_client', 'QUIC': 'quic_client'}
+
+    metrics = [
+        ('Total Packets', 'total_packets'),
+        ('Total Bytes', 'total_bytes'),
+        ('Avg Bandwidth (Mbps)', 'avg_bandwidth_mbps'),
+        ('Avg Jitter (ms)', 'avg_jitter_ms'),
+        ('Total Retransmissions', 'total_retransmissions'),
+        ('Avg Loss (%)', 'avg_loss_percent'),
+    ]
+
+    rows = [
+        {'Metric': metric_name,
+         **{column: results.get(protocol, {}).get(key, 'N/A') for column, protocol in columns.items()}}
+        for metric_name, key in metrics
+    ]
+
     with open(csv_path, 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile)
-
-        # Header
-        writer.writerow(['Metric', 'BBR', 'CUBIC', 'QUIC'])
-
-        # Data
-        metrics = [
-            ('Total Packets', 'total_packets'),
-            ('Total Bytes', 'total_bytes'),
-            ('Avg Bandwidth (Mbps)', 'avg_bandwidth_mbps'),
-            ('Avg Jitter (ms)', 'avg_jitter_ms'),
-            ('Total Retransmissions', 'total_retransmissions'),
-            ('Avg Loss (%)', 'avg_loss_percent'),
-        ]
-
-        for metric_name, key in metrics:
-            row = [metric_name]
-            for protocol in protocols:
-                if protocol in results:
-                    row.append(results[protocol].get(key, 'N/A'))
-                else:
-                    row.append('N/A')
-            writer.writerow(row)
+        writer = csv.DictWriter(csvfile, fieldnames=['Metric', *columns])
+        writer.writeheader()
+        writer.writerows(rows)
 
     print(f"✓ Comparison exported to: {csv_path}\n")
 
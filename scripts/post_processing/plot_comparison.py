@@ -3,12 +3,41 @@
 Script to plot comparative graphs between BBR, CUBIC, and QUIC protocols
 """
 import argparse
+import os
+import sys
 from pathlib import Path
+import numpy as np
 import pandas as pd
+import matplotlib
+
+# Render straight to the Agg raster backend when there is no display (e.g. a container)
+if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 
+# Timeline columns used by the plots, parsed with fixed dtypes
+TIMELINE_DTYPES = {
+    'Second': np.int32,
+    'Bandwidth (Mbps)': np.float64,
+    'Loss (%)': np.float64,
+    'Retransmissions': np.int32,
+    'Jitter (ms)': np.float64,
+}
+
+
+# Line style of each timeline: label, color, linestyle, alpha
+SERIES_STYLE = {
+    'bbr_client': ('BBR Client', 'blue', '-', 0.7),
+    'bbr_server': ('BBR Server', 'blue', '--', 0.7),
+    'cubic_client': ('CUBIC Client', 'red', '-', 0.7),
+    'cubic_server': ('CUBIC Server', 'red', '--', 0.7),
+    'quic_client': ('QUIC Client', 'green', '-', 0.8),
+    'quic_server': ('QUIC Server', 'green', '--', 0.8),
+}
 
-def plot_comparison(results_dir: Path):
+
+def plot_comparison(results_dir: Path, dpi: int = 150):
     # Build expected file paths
     files = {
         'bbr_client': results_dir / 'bbr_client_timeline.csv',
@@ -33,70 +62,50 @@ def plot_comparison(results_dir: Path):
             print('\nNo CSV files found in', results_dir)
         raise SystemExit(1)
 
-    # Load timeline data
-    bbr_client = pd.read_csv(files['bbr_client'])
-    bbr_server = pd.read_csv(files['bbr_server'])
-    cubic_client = pd.read_csv(files['cubic_client'])
-    cubic_server = pd.read_csv(files['cubic_server'])
-    quic_client = pd.read_csv(files['quic_client'])
-    quic_server = pd.read_csv(files['quic_server'])
+    # Load all timelines into one long-form frame, tagged by source
+    frames = []
+    for source, path in files.items():
+        df = pd.read_csv(path, usecols=list(TIMELINE_DTYPES), dtype=TIMELINE_DTYPES)
+        df['source'] = source
+        frames.append(df)
+    timelines = pd.concat(frames, ignore_index=True)
+
+    # Split it back per source once, as NumPy columns for matplotlib
+    series = {
+        source: {col: group[col].to_numpy() for col in TIMELINE_DTYPES}
+        for source, group in timelines.groupby('source', sort=False)
+    }
 
     # Create subplots
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
     fig.suptitle('BBR vs CUBIC vs QUIC Comparison - Metrics per Second', fontsize=16)
 
-    # Bandwidth comparison
-    ax1.plot(bbr_client['Second'], bbr_client['Bandwidth (Mbps)'], label='BBR Client', color='blue', alpha=0.7)
-    ax1.plot(bbr_server['Second'], bbr_server['Bandwidth (Mbps)'], label='BBR Server', color='blue', linestyle='--', alpha=0.7)
-    ax1.plot(cubic_client['Second'], cubic_client['Bandwidth (Mbps)'], label='CUBIC Client', color='red', alpha=0.7)
-    ax1.plot(cubic_server['Second'], cubic_server['Bandwidth (Mbps)'], label='CUBIC Server', color='red', linestyle='--', alpha=0.7)
-    ax1.plot(quic_client['Second'], quic_client['Bandwidth (Mbps)'], label='QUIC Client', color='green', alpha=0.8)
-    ax1.plot(quic_server['Second'], quic_server['Bandwidth (Mbps)'], label='QUIC Server', color='green', linestyle='--', alpha=0.8)
-    ax1.set_title('Bandwidth (Mbps)')
-    ax1.set_xlabel('Second')
-    ax1.set_ylabel('Mbps')
-    ax1.legend()
-    ax1.grid(True, alpha=0.3)
-
-    # Packet Loss comparison (TCP protocols only - QUIC handles reliability differently)
-    ax2.plot(bbr_client['Second'], bbr_client['Loss (%)'], label='BBR Client', color='blue', alpha=0.7)
-    ax2.plot(bbr_server['Second'], bbr_server['Loss (%)'], label='BBR Server', color='blue', linestyle='--', alpha=0.7)
-    ax2.plot(cubic_client['Second'], cubic_client['Loss (%)'], label='CUBIC Client', color='red', alpha=0.7)
-    ax2.plot(cubic_server['Second'], cubic_server['Loss (%)'], label='CUBIC Server', color='red', linestyle='--', alpha=0.7)
-    ax2.set_title('Packet Loss (%) - TCP Protocols')
-    ax2.set_xlabel('Second')
-    ax2.set_ylabel('%')
-    ax2.legend()
-    ax2.grid(True, alpha=0.3)
-
-    # Retransmissions comparison (TCP protocols only - QUIC handles reliability differently)
-    ax3.plot(bbr_client['Second'], bbr_client['Retransmissions'], label='BBR Client', color='blue', alpha=0.7)
-    ax3.plot(bbr_server['Second'], bbr_server['Retransmissions'], label='BBR Server', color='blue', linestyle='--', alpha=0.7)
-    ax3.plot(cubic_client['Second'], cubic_client['Retransmissions'], label='CUBIC Client', color='red', alpha=0.7)
-    ax3.plot(cubic_server['Second'], cubic_server['Retransmissions'], label='CUBIC Server', color='red', linestyle='--', alpha=0.7)
-    ax3.set_title('Retransmissions - TCP Protocols')
-    ax3.set_xlabel('Second')
-    ax3.set_ylabel('Count')
-    ax3.legend()
-    ax3.grid(True, alpha=0.3)
-
-    # Jitter comparison
-    ax4.plot(bbr_client['Second'], bbr_client['Jitter (ms)'], label='BBR Client', color='blue', alpha=0.7)
-    ax4.plot(bbr_server['Second'], bbr_server['Jitter (ms)'], label='BBR Server', color='blue', linestyle='--', alpha=0.7)
-    ax4.plot(cubic_client['Second'], cubic_client['Jitter (ms)'], label='CUBIC Client', color='red', alpha=0.7)
-    ax4.plot(cubic_server['Second'], cubic_server['Jitter (ms)'], label='CUBIC Server', color='red', linestyle='--', alpha=0.7)
-    ax4.plot(quic_client['Second'], quic_client['Jitter (ms)'], label='QUIC Client', color='green', alpha=0.8)
-    ax4.plot(quic_server['Second'], quic_server['Jitter (ms)'], label='QUIC Server', color='green', linestyle='--', alpha=0.8)
-    ax4.set_title('Jitter (ms)')
-    ax4.set_xlabel('Second')
-    ax4.set_ylabel('ms')
-    ax4.legend()
-    ax4.grid(True, alpha=0.3)
+    # Loss and retransmissions are plotted for the TCP protocols only -
+    # QUIC handles reliability differently
+    panels = [
+        (ax1, 'Bandwidth (Mbps)', 'Bandwidth (Mbps)', 'Mbps', False),
+        (ax2, 'Loss (%)', 'Packet Loss (%) - TCP Protocols', '%', True),
+        (ax3, 'Retransmissions', 'Retransmissions - TCP Protocols', 'Count', True),
+        (ax4, 'Jitter (ms)', 'Jitter (ms)', 'ms', False),
+    ]
+
+    for ax, column, title, ylabel, tcp_only in panels:
+        for source, data in series.items():
+            if tcp_only and source.startswith('quic'):
+                continue
+            label, color, linestyle, alpha = SERIES_STYLE[source]
+            ax.plot(data['Second'], data[column], label=label, color=color, linestyle=linestyle, alpha=alpha)
+        ax.set_title(title)
+        ax.set_xlabel('Second')
+        ax.set_ylabel(ylabel)
+        ax.legend()
+        ax.grid(True, alpha=0.3)
 
     plt.tight_layout()
     out_png = results_dir / 'protocol_comparison.png'
-    plt.savefig(out_png, dpi=300, bbox_inches='tight')
-    plt.show()
+    plt.savefig(out_png, dpi=dpi, bbox_inches='tight')
+    if matplotlib.get_backend().lower() != 'agg':
+        plt.show()
 
     print(f"Plot saved to: {out_png}")
 
@@ -104,6 +113,8 @@ def _parse_args():
     parser = argparse.ArgumentParser(description='Plot BBR vs CUBIC vs QUIC comparison using files in results/')
     parser.add_argument('--results', '-r', type=str, default=None,
                         help='Path to results directory (default: repo/results)')
+    parser.add_argument('--dpi', type=int, default=150,
+                        help='Resolution of the saved PNG (default: 150)')
     return parser.parse_args()
 
 
@@ -117,4 +128,4 @@ if __name__ == "__main__":
         script_dir = Path(__file__).resolve().parent
         results_path = script_dir.parent.parent / 'results'
 
-    plot_comparison(results_path)
\ No newline at end of file
+    plot_comparison(results_path, dpi=args.dpi)
\ No newline at end of file
@@ -7,37 +7,62 @@ from aioquic.asyncio.protocol import QuicConnectionProtocol
 from aioquic.quic.configuration import QuicConfiguration
 from aioquic.quic.events import StreamDataReceived
 
+try:
+    # libuv-based event loop, used when installed
+    from uvloop import run as run_event_loop
+except ImportError:
+    run_event_loop = asyncio.run
+
+# Flow-control windows well above the bandwidth-delay product of the test link
+# (aioquic defaults both to 1 MiB)
+MAX_DATA = 128 * 1024 * 1024
+MAX_STREAM_DATA = 16 * 1024 * 1024
+
 class ClientQuicProtocol(QuicConnectionProtocol):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._received = 0
-        self._done = asyncio.Event()
+        # Per-stream state, so several transfers can share the connection
+        self._received = {}
+        self._done = {}
     def quic_event_received(self, event):
-        if isinstance(event, StreamDataReceived):
-            self._received += len(event.data)
+        if isinstance(event, StreamDataReceived) and event.stream_id in self._done:
+            self._received[event.stream_id] += len(event.data)
             if event.end_stream:
-                self._done.set()
+                self._done[event.stream_id].set()
+    async def fetch(self):
+        """Request the test data on a new stream and return the bytes received"""
+        stream_id = self._quic.get_next_available_stream_id()
+        self._received[stream_id] = 0
+        done = self._done[stream_id] = asyncio.Event()
+        self._quic.send_stream_data(stream_id, b"GET /data", end_stream=True)
+        self.transmit()
+        await done.wait()
+        del self._done[stream_id]
+        return self._received.pop(stream_id)
 
-async def run_client(host, duration=30):
-    configuration = QuicConfiguration(is_client=True)
-    configuration.verify_mode = False
-    start_time = time.time()
+async def _transfer_loop(protocol, start_time, duration):
     results = []
     while time.time() - start_time < duration:
-        async with connect(host, 443, configuration=configuration, create_protocol=ClientQuicProtocol) as protocol:
-            stream_id = protocol._quic.get_next_available_stream_id()
-            protocol._quic.send_stream_data(stream_id, b"GET /data", end_stream=True)
-            protocol.transmit()
-            await protocol._done.wait()
-            results.append(protocol._received)
+        results.append(await protocol.fetch())
     return results
 
+async def run_client(host, duration=30):
+    return await run_client_parallel(host, duration, num_transfers=1)
+
 async def run_client_parallel(host, duration=30, num_transfers=1):
-    async def single_transfer():
-        return await run_client(host, duration)
-    
-    tasks = [single_transfer() for _ in range(num_transfers)]
-    all_results = await asyncio.gather(*tasks)
+    configuration = QuicConfiguration(
+        is_client=True,
+        max_data=MAX_DATA,
+        max_stream_data=MAX_STREAM_DATA,
+        congestion_control_algorithm=os.environ.get('QUIC_CONGESTION_CONTROL', 'cubic'),
+    )
+    configuration.verify_mode = False
+    start_time = time.time()
+    # One connection (one handshake, one congestion controller) for the whole
+    # test; the parallel transfers run as concurrent streams on it
+    async with connect(host, 443, configuration=configuration, create_protocol=ClientQuicProtocol) as protocol:
+        tasks = [_transfer_loop(protocol, start_time, duration) for _ in range(num_transfers)]
+        all_results = await asyncio.gather(*tasks)
     # Flatten the results
     flattened = [item for sublist in all_results for item in sublist]
     return flattened
@@ -47,5 +72,5 @@ if __name__ == "__main__":
     host = sys.argv[1] if len(sys.argv) > 1 else "quic_server"
     duration = int(os.environ.get('TEST_DURATION', 30))
     num_transfers = int(os.environ.get('QUIC_TRANSFERS', 1))
-    res = asyncio.run(run_client_parallel(host, duration, num_transfers))
+    res = run_event_loop(run_client_parallel(host, duration, num_transfers))
     print(res)
@@ -6,16 +6,35 @@ from aioquic.quic.configuration import QuicConfiguration
 from aioquic.asyncio.protocol import QuicConnectionProtocol
 from aioquic.quic.events import StreamDataReceived
 
+try:
+    # libuv-based event loop, used when installed
+    from uvloop import run as run_event_loop
+except ImportError:
+    run_event_loop = asyncio.run
+
+# Flow-control windows well above the bandwidth-delay product of the test link
+# (aioquic defaults both to 1 MiB)
+MAX_DATA = 128 * 1024 * 1024
+MAX_STREAM_DATA = 16 * 1024 * 1024
+
 class QuicServer(QuicConnectionProtocol):
+    payload = b''  # Test file contents, read once in run_server()
+
     def quic_event_received(self, event):
         if isinstance(event, StreamDataReceived):
-            size_mb = int(os.environ.get('QUIC_DATA_SIZE_MB', 5))
-            with open('/tmp/testfile.bin', 'rb') as f:
-                data = f.read(size_mb * 1024 * 1024)
-            self._quic.send_stream_data(event.stream_id, data, end_stream=True)
+            self._quic.send_stream_data(event.stream_id, self.payload, end_stream=True)
 
 async def run_server():
-    configuration = QuicConfiguration(is_client=False)
+    size_mb = int(os.environ.get('QUIC_DATA_SIZE_MB', 5))
+    with open('/tmp/testfile.bin', 'rb') as f:
+        QuicServer.payload = f.read(size_mb * 1024 * 1024)
+
+    configuration = QuicConfiguration(
+        is_client=False,
+        max_data=MAX_DATA,
+        max_stream_data=MAX_STREAM_DATA,
+        congestion_control_algorithm=os.environ.get('QUIC_CONGESTION_CONTROL', 'cubic'),
+    )
     configuration.load_cert_chain('/tmp/cert.pem', '/tmp/key.pem')
     await serve(
         '0.0.0.0',
@@ -28,4 +47,4 @@ async def run_server():
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1 and sys.argv[1] == '--run-server':
-        asyncio.run(run_server())
+        run_event_loop(run_server())
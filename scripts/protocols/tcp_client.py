@@ -17,11 +17,11 @@ def main():
     print(f"Starting iperf3 client with {cc_algorithm.upper()} congestion control")
     print(f"Server: {server}, Duration: {duration}s, Parallel streams: {parallel}")
     
-    cmd = f"iperf3 -c {server} -t {duration} -P {parallel}"
+    cmd = ["iperf3", "-c", server, "-t", str(duration), "-P", str(parallel)]
     if window:
-        cmd += f" -w {window}"
+        cmd += ["-w", window]
     
-    subprocess.run(cmd, shell=True)
+    subprocess.run(cmd)
 
 if __name__ == "__main__":
     main()
@@ -9,7 +9,7 @@ import os
 def main():
     cc_algorithm = os.environ.get('TCP_CONGESTION_CONTROL', 'cubic')
     print(f"Starting iperf3 server with {cc_algorithm.upper()} congestion control")
-    subprocess.run("iperf3 -s -1 -p 5201", shell=True)
+    subprocess.run(["iperf3", "-s", "-1", "-p", "5201"])
 
 if __name__ == "__main__":
     main()